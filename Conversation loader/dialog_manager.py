@@ -9,11 +9,19 @@ Features:
 - Organize by date, topic, or tags
 """
 
+import io
 import os
-import json
+import re
+import atexit
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional, Any
+import orjson
+import zstandard as zstd
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterator, Optional, Tuple, Any
 from mcp.server.fastmcp import FastMCP
 
 # instantiate an MCP server for dialog management
@@ -23,19 +31,510 @@ mcp = FastMCP("Dialog Manager")
 DIALOGS_DIR = Path.home() / "Documents" / "saved_dialogs"
 DIALOGS_DIR.mkdir(parents=True, exist_ok=True)
 
+# All dialogs live in one SQLite database; JSON files saved by earlier
+# versions are imported into it on first start
+DB_PATH = DIALOGS_DIR / "dialogs.db"
+SCHEMA_VERSION = 1
 
-def get_dialog_path(dialog_id: str) -> Path:
-    """Get the path for a dialog file"""
-    return DIALOGS_DIR / f"{dialog_id}.json"
+# Dialog bodies at least this large are stored zstd-compressed
+COMPRESS_THRESHOLD = 16 * 1024
+COMPRESSION_LEVEL = 3
 
+# Worker threads used when importing dialog files
+READ_WORKERS = 16
+
+# "always" makes SQLite sync on every commit and fsyncs exported files;
+# the default "never" relies on WAL mode's sync at checkpoints
+FSYNC_POLICIES = ("never", "always")
+FSYNC_POLICY = (os.environ.get("DIALOG_FSYNC") or "never").strip().lower()
+if FSYNC_POLICY not in FSYNC_POLICIES:
+    raise ValueError(
+        f"DIALOG_FSYNC must be one of {', '.join(FSYNC_POLICIES)}, "
+        f"got {os.environ['DIALOG_FSYNC']!r}"
+    )
+
+# Dialog fields stored as columns rather than in the body
+LISTING_FIELDS = ('id', 'title', 'timestamp', 'tags')
+
+_fts_available = True
+
+_last_save_time: Optional[datetime] = None
+
+# Read once at startup; mkstemp creates files private to the user, and
+# written files should get the same permissions a plain open() would give
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def normalize_tag(tag: str) -> str:
+    """Normalize a tag for case- and whitespace-insensitive matching"""
+    return tag.strip().lower()
+
+
+def count_words(text: str) -> int:
+    """Approximate the word count by counting spaces, without splitting the text"""
+    return text.count(' ') + bool(text.strip())
+
+
+def format_messages(messages: List[Dict[str, str]]) -> str:
+    """Format structured messages as readable text"""
+    formatted_content = []
+    for msg in messages:
+        role = msg.get('role', 'unknown').upper()
+        content = msg.get('content', '')
+        formatted_content.append(f"[{role}]: {content}")
+    
+    return "\n\n".join(formatted_content)
+
+
+def generate_dialog_id(now: Optional[datetime] = None) -> str:
+    """Generate a unique dialog ID based on timestamp
+    
+    Args:
+        now: Save time to derive the ID from, so it matches the saved timestamp
+    """
+    now = now or datetime.now()
+    return f"{now:%Y%m%d_%H%M%S}_{now.microsecond:06d}"
+
+
+def next_save_time() -> datetime:
+    """Get the time for a new save, strictly later than the previous save
+    
+    Dialog IDs include microseconds, so bumping a repeated clock reading keeps
+    IDs unique even for saves made within the same clock tick.
+    """
+    global _last_save_time
+    
+    now = datetime.now()
+    if _last_save_time is not None and now <= _last_save_time:
+        now = _last_save_time + timedelta(microseconds=1)
+    
+    _last_save_time = now
+    return now
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write a file through a temporary file so readers never see a partial write"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if FSYNC_POLICY == "always":
+                f.flush()
+                os.fsync(f.fileno())
+        
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+# ==================== DATABASE ====================
+
+SCHEMA = """
+-- rowid is declared so VACUUM can't renumber it; it keys the dialog's search row
+CREATE TABLE IF NOT EXISTS dialogs (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    word_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dialogs_timestamp ON dialogs (timestamp);
+
+-- Kept apart from the listing columns so title/tag edits never rewrite the body
+CREATE TABLE IF NOT EXISTS dialog_bodies (
+    id TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    compressed INTEGER NOT NULL
+);
+
+-- Normalized tag to dialog ID lookup
+CREATE TABLE IF NOT EXISTS dialog_tags (
+    tag TEXT NOT NULL,
+    dialog_id TEXT NOT NULL,
+    PRIMARY KEY (tag, dialog_id)
+);
+CREATE INDEX IF NOT EXISTS dialog_tags_dialog ON dialog_tags (dialog_id);
+"""
+
+
+def _open_db() -> sqlite3.Connection:
+    """Open the dialog database and create its tables if needed"""
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={'FULL' if FSYNC_POLICY == 'always' else 'NORMAL'}")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def _transaction() -> Iterator[sqlite3.Connection]:
+    """Run a block of statements as one transaction"""
+    _db.execute("BEGIN")
+    try:
+        yield _db
+    except BaseException:
+        _db.execute("ROLLBACK")
+        raise
+    _db.execute("COMMIT")
+
+
+def _encode_body(dialog: Dict[str, Any]) -> Tuple[bytes, bool]:
+    """Serialize the non-listing fields of a dialog, compressing large ones"""
+    body = {k: v for k, v in dialog.items() if k not in LISTING_FIELDS}
+    data = orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS)
+    
+    if len(data) >= COMPRESS_THRESHOLD:
+        return zstd.ZstdCompressor(level=COMPRESSION_LEVEL).compress(data), True
+    return data, False
+
+
+def _decode_body(body: bytes, compressed: int) -> bytes:
+    """Get the JSON of a stored dialog body"""
+    if compressed:
+        return zstd.ZstdDecompressor().decompress(body)
+    return body
+
+
+def _dialog_text(dialog: Dict[str, Any]) -> str:
+    """Get the searchable text of a dialog, leaving out role labels"""
+    if 'messages' in dialog:
+        return "\n\n".join(m.get('content', '') for m in dialog['messages'])
+    return dialog.get('content', '')
 
-def generate_dialog_id() -> str:
-    """Generate a unique dialog ID based on timestamp"""
-    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+def _set_tags(dialog_id: str, tags: List[str], clear: bool = True) -> None:
+    """Replace the tag lookup rows of a dialog
+    
+    Args:
+        dialog_id: ID of the dialog
+        tags: Tags to store
+        clear: Whether to remove existing rows first; new dialogs have none
+    """
+    if clear:
+        _db.execute("DELETE FROM dialog_tags WHERE dialog_id = ?", (dialog_id,))
+    _db.executemany(
+        "INSERT INTO dialog_tags (tag, dialog_id) VALUES (?, ?)",
+        [(key, dialog_id) for key in {normalize_tag(t) for t in tags}]
+    )
+
+
+def _insert_dialog(dialog: Dict[str, Any], replace: bool = False) -> None:
+    """Store a dialog
+    
+    Must be called inside a transaction.
+    
+    Args:
+        dialog: The dialog data
+        replace: Replace any previous dialog with the same ID instead of
+            raising sqlite3.IntegrityError. New saves must not replace, since
+            another server process can generate the same ID.
+    """
+    body, compressed = _encode_body(dialog)
+    tags = dialog.get('tags', [])
+    insert = "INSERT OR REPLACE" if replace else "INSERT"
+    
+    existing = None
+    if replace:
+        # A replaced dialog keeps its rowid, so only its search row needs dropping
+        existing = _db.execute(
+            "SELECT rowid FROM dialogs WHERE id = ?", (dialog['id'],)
+        ).fetchone()
+    rowid = existing[0] if existing else None
+    if existing and _fts_available:
+        _db.execute("DELETE FROM dialogs_fts WHERE rowid = ?", (rowid,))
+    
+    rowid = _db.execute(
+        f"{insert} INTO dialogs (rowid, id, title, timestamp, tags, word_count) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            rowid,
+            dialog['id'],
+            dialog['title'],
+            dialog['timestamp'],
+            orjson.dumps(tags).decode(),
+            dialog.get('word_count', dialog.get('total_words', 0))
+        )
+    ).lastrowid
+    _db.execute(
+        f"{insert} INTO dialog_bodies (id, body, compressed) VALUES (?, ?, ?)",
+        (dialog['id'], body, compressed)
+    )
+    _set_tags(dialog['id'], tags, clear=existing is not None)
+    _index_dialog(rowid, dialog)
+
+
+def _delete_dialog(dialog_id: str) -> bool:
+    """Delete a dialog, returning False if it doesn't exist"""
+    row = _db.execute("SELECT rowid FROM dialogs WHERE id = ?", (dialog_id,)).fetchone()
+    if row is None:
+        return False
+    
+    with _transaction():
+        _db.execute("DELETE FROM dialogs WHERE rowid = ?", row)
+        _db.execute("DELETE FROM dialog_bodies WHERE id = ?", (dialog_id,))
+        _db.execute("DELETE FROM dialog_tags WHERE dialog_id = ?", (dialog_id,))
+        if _fts_available:
+            _db.execute("DELETE FROM dialogs_fts WHERE rowid = ?", row)
+    
+    return True
+
+
+def _update_dialog_meta(dialog_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Update the title and/or tags of a dialog without touching its body
+    
+    Returns:
+        The dialog's title and tags before the edit, or None if it doesn't exist
+    """
+    row = _db.execute(
+        "SELECT rowid, title, tags FROM dialogs WHERE id = ?", (dialog_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    
+    rowid, old_title, old_tags = row
+    
+    with _transaction():
+        if 'title' in changes:
+            _db.execute(
+                "UPDATE dialogs SET title = ? WHERE rowid = ?", (changes['title'], rowid)
+            )
+        if 'tags' in changes:
+            _db.execute(
+                "UPDATE dialogs SET tags = ? WHERE rowid = ?",
+                (orjson.dumps(changes['tags']).decode(), rowid)
+            )
+            _set_tags(dialog_id, changes['tags'])
+        _reindex_meta(rowid, changes)
+    
+    return {"title": old_title, "tags": orjson.loads(old_tags)}
+
+
+def _read_dialog(dialog_id: str) -> Dict[str, Any]:
+    """Read a dialog by ID
+    
+    Raises:
+        LookupError: If the dialog doesn't exist
+    """
+    row = _db.execute(
+        "SELECT d.title, d.timestamp, d.tags, b.body, b.compressed "
+        "FROM dialogs d JOIN dialog_bodies b ON b.id = d.id WHERE d.id = ?",
+        (dialog_id,)
+    ).fetchone()
+    if row is None:
+        raise LookupError(f"Dialog {dialog_id} not found")
+    
+    title, timestamp, tags, body, compressed = row
+    return {
+        "id": dialog_id,
+        "title": title,
+        "timestamp": timestamp,
+        "tags": orjson.loads(tags),
+        **orjson.loads(_decode_body(body, compressed))
+    }
+
+
+# ==================== SEARCH INDEX ====================
+
+def _ensure_fts() -> bool:
+    """Create the full-text index if needed, returning False without FTS5 support"""
+    exists = _db.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'dialogs_fts'"
+    ).fetchone()
+    if exists:
+        return True
+    
+    try:
+        _db.execute(
+            "CREATE VIRTUAL TABLE dialogs_fts USING fts5(title, content)"
+        )
+    except sqlite3.OperationalError:
+        return False
+    
+    # Index dialogs stored while FTS5 was unavailable
+    rows = _db.execute(
+        "SELECT d.rowid, d.title, b.body, b.compressed "
+        "FROM dialogs d JOIN dialog_bodies b ON b.id = d.id"
+    ).fetchall()
+    with _transaction():
+        for rowid, title, body, compressed in rows:
+            _db.execute(
+                "INSERT INTO dialogs_fts (rowid, title, content) VALUES (?, ?, ?)",
+                (rowid, title, _dialog_text(orjson.loads(_decode_body(body, compressed))))
+            )
+    
+    return True
+
+
+def _index_dialog(rowid: int, dialog: Dict[str, Any]) -> None:
+    """Add a dialog to the search index under its dialogs rowid"""
+    if not _fts_available:
+        return
+    
+    _db.execute(
+        "INSERT INTO dialogs_fts (rowid, title, content) VALUES (?, ?, ?)",
+        (rowid, dialog.get('title', ''), _dialog_text(dialog))
+    )
+
+
+def _reindex_meta(rowid: int, changes: Dict[str, Any]) -> None:
+    """Update the indexed title of a dialog; tags are searched through dialog_tags"""
+    if not _fts_available or 'title' not in changes:
+        return
+    
+    _db.execute(
+        "UPDATE dialogs_fts SET title = ? WHERE rowid = ?",
+        (changes['title'], rowid)
+    )
+
+
+def _search_condition(search: str) -> Tuple[str, List[Any]]:
+    """Get an SQL condition on dialogs.id matching every search term in title or content"""
+    terms = re.findall(r"\w+", search.lower())
+    if not terms:
+        return "0", []
+    
+    if not _fts_available:
+        return "id IN (SELECT value FROM json_each(?))", [orjson.dumps(_scan_search(terms)).decode()]
+    
+    # Prefix-match each term so partial words still hit; matches inside a word
+    # (e.g. "log" in "catalog") are intentionally not found
+    query = " AND ".join(f'"{t}"*' for t in terms)
+    return "rowid IN (SELECT rowid FROM dialogs_fts WHERE dialogs_fts MATCH ?)", [query]
+
+
+def _scan_search(terms: List[str]) -> List[str]:
+    """Get the IDs of matching dialogs by scanning every dialog body"""
+    # Match terms as word prefixes, like the FTS5 query does
+    patterns = [re.compile(r"\b" + re.escape(t), re.IGNORECASE) for t in terms]
+    
+    # Raw bytes can only be case-folded reliably for ASCII terms
+    needles = [t.encode() for t in terms if t.isascii()]
+    
+    rows = _db.execute(
+        "SELECT d.id, d.title, b.body, b.compressed "
+        "FROM dialogs d JOIN dialog_bodies b ON b.id = d.id"
+    )
+    
+    matching_ids = []
+    for dialog_id, title, body, compressed in rows:
+        raw = _decode_body(body, compressed)
+        
+        # Skip bodies that can't match before paying for a full parse
+        raw_lower = title.encode().lower() + raw.lower()
+        if not all(needle in raw_lower for needle in needles):
+            continue
+        
+        text = title + "\n" + _dialog_text(orjson.loads(raw))
+        if all(pattern.search(text) for pattern in patterns):
+            matching_ids.append(dialog_id)
+    
+    return matching_ids
+
+
+# ==================== LEGACY FILE IMPORT ====================
+
+def get_dialog_files() -> List[os.DirEntry]:
+    """Get all dialog files saved by earlier versions"""
+    with os.scandir(DIALOGS_DIR) as entries:
+        return [e for e in entries if e.name.endswith(".json")]
+
+
+def _read_dialog_file(path: Path) -> Dict[str, Any]:
+    """Read a dialog file saved by an earlier version"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def read_all_dialogs() -> Iterator[Dict[str, Any]]:
+    """Read every dialog file concurrently, skipping unreadable ones"""
+    def try_read(entry: os.DirEntry) -> Optional[Dict[str, Any]]:
+        try:
+            return _read_dialog_file(Path(entry.path))
+        except Exception:
+            return None
+    
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        for data in executor.map(try_read, get_dialog_files()):
+            if data is not None:
+                yield data
+
+
+def _import_dialog_files() -> None:
+    """Import the dialog files saved by earlier versions into the database
+    
+    The files are left in place; they are no longer read once imported.
+    Malformed dialogs are skipped without leaving any of their rows behind.
+    """
+    with _transaction():
+        for data in read_all_dialogs():
+            _db.execute("SAVEPOINT import_dialog")
+            try:
+                _insert_dialog(data, replace=True)
+            except Exception:
+                _db.execute("ROLLBACK TO import_dialog")
+            _db.execute("RELEASE import_dialog")
+
+
+_db = _open_db()
+_fts_available = _ensure_fts()
+
+if _db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+    _import_dialog_files()
+    _db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+atexit.register(_db.close)
 
 
 # ==================== SAVE DIALOGS ====================
 
+def _build_dialog(
+    content: str,
+    title: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the stored data for a plain-text dialog"""
+    now = next_save_time()
+    dialog_id = generate_dialog_id(now)
+    
+    return {
+        "id": dialog_id,
+        "title": title or f"Dialog {dialog_id}",
+        "timestamp": now.isoformat(),
+        "tags": tags or [],
+        "metadata": metadata or {},
+        "word_count": count_words(content),
+        "char_count": len(content),
+        "content": content
+    }
+
+
+def _build_conversation(
+    messages: List[Dict[str, str]],
+    title: Optional[str] = None,
+    tags: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Build the stored data for a structured conversation"""
+    now = next_save_time()
+    dialog_id = generate_dialog_id(now)
+    
+    return {
+        "id": dialog_id,
+        "title": title or f"Conversation {dialog_id}",
+        "timestamp": now.isoformat(),
+        "tags": tags or [],
+        "message_count": len(messages),
+        "total_words": sum(count_words(m.get('content', '')) for m in messages),
+        "messages": messages
+    }
+
+
 @mcp.tool()
 def save_dialog(
     content: str,
@@ -55,30 +554,20 @@ def save_dialog(
         Information about the saved dialog
     """
     try:
-        dialog_id = generate_dialog_id()
-        
-        dialog_data = {
-            "id": dialog_id,
-            "title": title or f"Dialog {dialog_id}",
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "tags": tags or [],
-            "metadata": metadata or {},
-            "word_count": len(content.split()),
-            "char_count": len(content)
-        }
-        
-        file_path = get_dialog_path(dialog_id)
+        dialog_data = _build_dialog(content, title, tags, metadata)
+        dialog_id = dialog_data["id"]
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(dialog_data, f, indent=2, ensure_ascii=False)
+        with _transaction():
+            _insert_dialog(dialog_data)
         
         return {
             "success": True,
             "message": "Dialog saved successfully",
             "dialog_id": dialog_id,
             "title": dialog_data["title"],
-            "file_path": str(file_path),
+            "storage_path": str(DB_PATH),
+            # Deprecated: dialogs no longer have their own files; kept one release for old clients
+            "file_path": str(DB_PATH),
             "word_count": dialog_data["word_count"],
             "timestamp": dialog_data["timestamp"]
         }
@@ -104,39 +593,20 @@ def save_current_context(
         Information about the saved conversation
     """
     try:
-        dialog_id = generate_dialog_id()
-        
-        # Format messages nicely
-        formatted_content = []
-        for msg in messages:
-            role = msg.get('role', 'unknown').upper()
-            content = msg.get('content', '')
-            formatted_content.append(f"[{role}]: {content}")
-        
-        full_content = "\n\n".join(formatted_content)
-        
-        dialog_data = {
-            "id": dialog_id,
-            "title": title or f"Conversation {dialog_id}",
-            "messages": messages,
-            "formatted_content": full_content,
-            "timestamp": datetime.now().isoformat(),
-            "tags": tags or [],
-            "message_count": len(messages),
-            "total_words": len(full_content.split())
-        }
-        
-        file_path = get_dialog_path(dialog_id)
+        dialog_data = _build_conversation(messages, title, tags)
+        dialog_id = dialog_data["id"]
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(dialog_data, f, indent=2, ensure_ascii=False)
+        with _transaction():
+            _insert_dialog(dialog_data)
         
         return {
             "success": True,
             "message": "Conversation context saved",
             "dialog_id": dialog_id,
             "title": dialog_data["title"],
-            "file_path": str(file_path),
+            "storage_path": str(DB_PATH),
+            # Deprecated: dialogs no longer have their own files; kept one release for old clients
+            "file_path": str(DB_PATH),
             "message_count": len(messages),
             "timestamp": dialog_data["timestamp"]
         }
@@ -161,6 +631,53 @@ def quick_save(text: str) -> Dict[str, Any]:
     )
 
 
+@mcp.tool()
+def save_many(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Save many dialogs at once, e.g. when importing a conversation log
+    
+    All dialogs are stored in a single transaction, so the database is
+    synced once instead of per dialog.
+    
+    Args:
+        items: List of dialogs to save. Each item has either 'content' (plus
+            optional 'title', 'tags', 'metadata') like save_dialog, or
+            'messages' (plus optional 'title', 'tags') like save_current_context
+    
+    Returns:
+        IDs of the saved dialogs
+    """
+    try:
+        for i, item in enumerate(items):
+            if 'content' not in item and 'messages' not in item:
+                return {"error": f"Item {i} needs either 'content' or 'messages'"}
+        
+        dialogs = []
+        for item in items:
+            if 'messages' in item:
+                dialog_data = _build_conversation(
+                    item['messages'], item.get('title'), item.get('tags')
+                )
+            else:
+                dialog_data = _build_dialog(
+                    item['content'], item.get('title'), item.get('tags'), item.get('metadata')
+                )
+            dialogs.append(dialog_data)
+        
+        with _transaction():
+            for dialog_data in dialogs:
+                _insert_dialog(dialog_data)
+        
+        return {
+            "success": True,
+            "message": f"Saved {len(dialogs)} dialogs",
+            "dialog_ids": [d["id"] for d in dialogs],
+            "count": len(dialogs)
+        }
+    
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ==================== LOAD DIALOGS ====================
 
 @mcp.tool()
@@ -174,13 +691,7 @@ def load_dialog(dialog_id: str) -> Dict[str, Any]:
         The dialog data
     """
     try:
-        file_path = get_dialog_path(dialog_id)
-        
-        if not file_path.exists():
-            return {"error": f"Dialog {dialog_id} not found"}
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            dialog_data = json.load(f)
+        dialog_data = _read_dialog(dialog_id)
         
         return {
             "success": True,
@@ -224,12 +735,7 @@ def load_dialog_content(dialog_id: str) -> str:
         The dialog content as a string
     """
     try:
-        result = load_dialog(dialog_id)
-        
-        if result.get('error'):
-            return f"Error: {result['error']}"
-        
-        dialog = result['dialog']
+        dialog = _read_dialog(dialog_id)
         
         # Format nicely for AI to read
         output = []
@@ -240,13 +746,16 @@ def load_dialog_content(dialog_id: str) -> str:
         
         if 'messages' in dialog:
             # Structured conversation
-            output.append(dialog.get('formatted_content', ''))
+            output.append(format_messages(dialog['messages']))
         else:
             # Plain content
             output.append(dialog['content'])
         
         return "\n".join(output)
     
+    except LookupError as e:
+        return f"Error: {str(e)}"
+    
     except Exception as e:
         return f"Error loading dialog: {str(e)}"
 
@@ -270,47 +779,47 @@ def list_dialogs(
         List of dialogs with metadata
     """
     try:
-        dialog_files = sorted(
-            DIALOGS_DIR.glob("*.json"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True
+        conditions = []
+        params: List[Any] = []
+        
+        if tags:
+            keys = [normalize_tag(tag) for tag in tags]
+            conditions.append(
+                "id IN (SELECT dialog_id FROM dialog_tags WHERE tag IN "
+                f"({', '.join('?' * len(keys))}))"
+            )
+            params.extend(keys)
+        
+        if search:
+            condition, search_params = _search_condition(search)
+            conditions.append(condition)
+            params.extend(search_params)
+        
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = _db.execute(
+            "SELECT id, title, timestamp, tags, word_count FROM dialogs "
+            f"{where}ORDER BY timestamp DESC LIMIT ?",
+            (*params, limit)
         )
         
         dialogs = []
         
-        for file_path in dialog_files[:limit]:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Apply filters
-                if tags:
-                    if not any(tag in data.get('tags', []) for tag in tags):
-                        continue
-                
-                if search:
-                    search_lower = search.lower()
-                    if search_lower not in data.get('title', '').lower() and \
-                       search_lower not in data.get('content', '').lower():
-                        continue
-                
-                dialogs.append({
-                    "id": data['id'],
-                    "title": data['title'],
-                    "timestamp": data['timestamp'],
-                    "tags": data.get('tags', []),
-                    "word_count": data.get('word_count', 0),
-                    "file_path": str(file_path)
-                })
-            
-            except Exception:
-                continue
+        for dialog_id, title, timestamp, dialog_tags, word_count in rows:
+            dialogs.append({
+                "id": dialog_id,
+                "title": title,
+                "timestamp": timestamp,
+                "tags": orjson.loads(dialog_tags),
+                "word_count": word_count,
+                # Deprecated: dialogs no longer have their own files; kept one release for old clients
+                "file_path": str(DB_PATH)
+            })
         
         return {
             "success": True,
             "dialogs": dialogs,
             "total": len(dialogs),
-            "storage_path": str(DIALOGS_DIR)
+            "storage_path": str(DB_PATH)
         }
     
     except Exception as e:
@@ -370,13 +879,9 @@ def delete_dialog(dialog_id: str) -> Dict[str, Any]:
         Deletion result
     """
     try:
-        file_path = get_dialog_path(dialog_id)
-        
-        if not file_path.exists():
+        if not _delete_dialog(dialog_id):
             return {"error": f"Dialog {dialog_id} not found"}
         
-        file_path.unlink()
-        
         return {
             "success": True,
             "message": f"Dialog {dialog_id} deleted"
@@ -398,16 +903,8 @@ def update_dialog_tags(dialog_id: str, tags: List[str]) -> Dict[str, Any]:
         Update result
     """
     try:
-        result = load_dialog(dialog_id)
-        if result.get('error'):
-            return result
-        
-        dialog_data = result['dialog']
-        dialog_data['tags'] = tags
-        
-        file_path = get_dialog_path(dialog_id)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(dialog_data, f, indent=2, ensure_ascii=False)
+        if _update_dialog_meta(dialog_id, {"tags": tags}) is None:
+            return {"error": f"Dialog {dialog_id} not found"}
         
         return {
             "success": True,
@@ -432,17 +929,11 @@ def rename_dialog(dialog_id: str, new_title: str) -> Dict[str, Any]:
         Rename result
     """
     try:
-        result = load_dialog(dialog_id)
-        if result.get('error'):
-            return result
-        
-        dialog_data = result['dialog']
-        old_title = dialog_data['title']
-        dialog_data['title'] = new_title
+        old_entry = _update_dialog_meta(dialog_id, {"title": new_title})
+        if old_entry is None:
+            return {"error": f"Dialog {dialog_id} not found"}
         
-        file_path = get_dialog_path(dialog_id)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(dialog_data, f, indent=2, ensure_ascii=False)
+        old_title = old_entry['title']
         
         return {
             "success": True,
@@ -470,11 +961,7 @@ def export_dialog_as_markdown(dialog_id: str, output_path: Optional[str] = None)
         Export result with file path
     """
     try:
-        result = load_dialog(dialog_id)
-        if result.get('error'):
-            return result
-        
-        dialog = result['dialog']
+        dialog = _read_dialog(dialog_id)
         
         if not output_path:
             output_path = DIALOGS_DIR / f"{dialog_id}.md"
@@ -482,23 +969,25 @@ def export_dialog_as_markdown(dialog_id: str, output_path: Optional[str] = None)
             output_path = Path(output_path)
         
         # Create markdown content
-        markdown = []
-        markdown.append(f"# {dialog['title']}\n")
-        markdown.append(f"**Saved:** {dialog['timestamp']}")
-        markdown.append(f"**Tags:** {', '.join(dialog.get('tags', []))}\n")
-        markdown.append("---\n")
+        buf = io.StringIO()
+        w = buf.write
+        
+        w(f"# {dialog['title']}\n\n")
+        w(f"**Saved:** {dialog['timestamp']}\n")
+        w(f"**Tags:** {', '.join(dialog.get('tags', []))}\n\n")
+        w("---\n\n")
         
         if 'messages' in dialog:
             for msg in dialog['messages']:
                 role = msg.get('role', 'unknown').upper()
                 content = msg.get('content', '')
-                markdown.append(f"## {role}\n")
-                markdown.append(f"{content}\n")
+                w(f"## {role}\n\n")
+                w(f"{content}\n\n")
         else:
-            markdown.append(dialog['content'])
+            w(dialog['content'])
+            w("\n")
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(markdown))
+        _atomic_write(output_path, buf.getvalue().encode('utf-8'))
         
         return {
             "success": True,
@@ -518,13 +1007,15 @@ def get_storage_info() -> Dict[str, Any]:
         Storage statistics
     """
     try:
-        dialog_files = list(DIALOGS_DIR.glob("*.json"))
+        total_dialogs = _db.execute("SELECT COUNT(*) FROM dialogs").fetchone()[0]
         
-        total_size = sum(f.stat().st_size for f in dialog_files)
+        # Recent writes may still be in the write-ahead log
+        db_files = (DB_PATH, DB_PATH.with_name(DB_PATH.name + "-wal"))
+        total_size = sum(p.stat().st_size for p in db_files if p.exists())
         
         return {
-            "storage_path": str(DIALOGS_DIR),
-            "total_dialogs": len(dialog_files),
+            "storage_path": str(DB_PATH),
+            "total_dialogs": total_dialogs,
             "total_size_mb": f"{total_size / (1024*1024):.2f}",
             "total_size_bytes": total_size
         }
@@ -556,7 +1047,7 @@ def get_recent_dialogs_resource() -> str:
         List of recent dialogs
     """
     result = get_recent_dialogs(10)
-    return json.dumps(result, indent=2)
+    return orjson.dumps(result).decode()
 
 
 # execute and return the stdio output